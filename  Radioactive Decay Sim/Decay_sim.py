@@ -1,42 +1,101 @@
+import argparse
 import numpy as np 
-from scipy.integrate import odeint 
+import matplotlib  # type: ignore
 import matplotlib.pyplot as plt  # type: ignore
+from scipy.linalg import expm
 
-def fission_prod_chain(y, t, lambda_a, lambda_b):
-    na, nb, nc = y
-    dnadt = s_a + (-lambda_a * na)   # Decay of na to nb
-    dnbdt = lambda_a * na - lambda_b * nb  # Conversion of na to nb and decay of nb
-    dncdt = lambda_b * nb  # Decay of nb to nc
-    return [dnadt, dnbdt, dncdt]
+def linear_chain_solution(A, b, y0, t, max_cond=1e8):
+    """
+    Exact solution of dy/dt = A y + b over the time array t, from the
+    eigendecomposition A = V diag(w) V^-1. In modal coordinates z = V^-1 y
+    each mode is z_k(t) = z_k(0) exp(w_k t) + c_k (exp(w_k t) - 1)/w_k with
+    c = V^-1 b (c_k t for w_k = 0, e.g. a stable end product).
+    If A is defective or nearly so (repeated decay constants, cond(V) > max_cond)
+    the eigenvectors are unreliable, so fall back to the matrix exponential of
+    the augmented system [[A, b], [0, 0]] acting on [y0, 1].
+    Returns y[len(t), len(y0)]
+    """
+    w, V = np.linalg.eig(A)
+    if np.linalg.cond(V) > max_cond:
+        n = len(y0)
+        M = np.zeros((n + 1, n + 1))
+        M[:n, :n] = A
+        M[:n, n] = b
+        return (expm(t[:, None, None] * M) @ np.append(y0, 1.0))[:, :n]
+    z0 = np.linalg.solve(V, y0)
+    c = np.linalg.solve(V, b)
+    wt = np.outer(t, w)
+    stable = w == 0
+    growth = np.where(stable, t[:, None], np.expm1(wt) / np.where(stable, 1, w))
+    z = z0 * np.exp(wt) + c * growth
+    return np.real(z @ V.T)
 
-# Initial Parameters 
-s_a = 0.5 # Constant Source Rate
-na0 = 50  # Initial number of na
-lambda_a = 0.10  # Decay constant for na
+def fission_prod_chain_matrix(s_a, lambda_a, lambda_b):
+    """
+    Bateman matrix A and source b of the three-species chain a -> b -> c with a
+    constant source s_a of a, dy/dt = A y + b:
+      dna/dt = s_a - lambda_a na                (decay of na to nb)
+      dnb/dt = lambda_a na - lambda_b nb        (conversion of na to nb and decay of nb)
+      dnc/dt = lambda_b nb                      (decay of nb to nc)
+    """
+    A = np.array([[-lambda_a, 0, 0],
+                  [lambda_a, -lambda_b, 0],
+                  [0, lambda_b, 0]])
+    b = np.array([s_a, 0, 0])
+    return A, b
 
-nb0 = 0     # Initial number of nb
-lambda_b = 0.03  # Decay constant for nb
+def fission_prod_chain_analytic(t, na0, nb0, nc0, s_a, lambda_a, lambda_b):
+    """
+    Exact (Bateman) solution of the chain in fission_prod_chain_matrix over the time array t.
+    """
+    A, b = fission_prod_chain_matrix(s_a, lambda_a, lambda_b)
+    y = linear_chain_solution(A, b, np.array([na0, nb0, nc0], dtype=float), t)
+    return y[:, 0], y[:, 1], y[:, 2]
 
-nc0 = 0     # Initial number of nc
+def simulate(na0=50, nb0=0, nc0=0, s_a=0.5, lambda_a=0.10, lambda_b=0.03, t_end=200, steps=1000):
+    """
+    Solve the chain over np.linspace(0, t_end, steps)
+    na0, nb0, nc0: initial number of na, nb, nc
+    s_a: constant source rate of na
+    lambda_a: decay constant for na (na -> nb)
+    lambda_b: decay constant for nb (nb -> nc)
+    t_end: long time range for clearer visualization
+    Returns dict with arrays 't', 'na', 'nb', 'nc'
+    """
+    t = np.linspace(0, t_end, steps)
+    na, nb, nc = fission_prod_chain_analytic(t, na0, nb0, nc0, s_a, lambda_a, lambda_b)
+    return {'t': t, 'na': na, 'nb': nb, 'nc': nc}
 
-# Time range (longer period)
-t = np.linspace(0, 200, 1000)  # Longer time range for clearer visualization
+def plot(results):
+    """
+    Plot the decay curves from simulate() and return the figure
+    """
+    fig = plt.figure()
+    t = results['t']
+    plt.plot(t, results['na'], label='na (Initial Particles)')
+    plt.plot(t, results['nb'], label='nb (Intermediate Particles)')
+    plt.plot(t, results['nc'], label='nc (Final Particles)')
+    plt.title("Radioactive Decay Simulation")
+    plt.xlabel("Time")
+    plt.ylabel("Remaining Particles")
+    plt.legend()
+    return fig
 
-# Initial conditions: [na, nb, nc]
-initial_conditions = [na0, nb0, nc0]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Three-species fission product decay chain")
+    parser.add_argument('--plot', action='store_true', help="show the decay curves")
+    parser.add_argument('--save', metavar='FILE', help="write the decay curves to FILE")
+    args = parser.parse_args()
+    if not args.plot:
+        matplotlib.use('Agg')  # No GUI needed for batch runs
 
-# Solve the ODE
-solution = odeint(fission_prod_chain, initial_conditions, t, args=(lambda_a, lambda_b))
+    results = simulate()
+    print("Particles at t =", results['t'][-1], ": na =", results['na'][-1],
+          "nb =", results['nb'][-1], "nc =", results['nc'][-1])
 
-# Extract solutions for each variable
-na, nb, nc = solution.T
-
-# Plot results
-plt.plot(t, na, label='na (Initial Particles)')
-plt.plot(t, nb, label='nb (Intermediate Particles)')
-plt.plot(t, nc, label='nc (Final Particles)')
-plt.title("Radioactive Decay Simulation")
-plt.xlabel("Time")
-plt.ylabel("Remaining Particles")
-plt.legend()
-plt.show()
\ No newline at end of file
+    if args.plot or args.save:
+        fig = plot(results)
+        if args.save:
+            fig.savefig(args.save)
+        if args.plot:
+            plt.show()
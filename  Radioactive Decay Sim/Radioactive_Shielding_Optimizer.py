@@ -1,7 +1,10 @@
+import argparse
 import numpy as np
+import matplotlib
 import matplotlib.pyplot as plt
 from math import log, exp
 from itertools import product
+from nuclear_kernels import mc_transmission_kernel
 
 # ---------------------------
 # Utility / physics functions
@@ -19,6 +22,7 @@ def transmission_exponential(mu_lin, thickness):
     Exponential attenuation: I/I0 = exp(-mu_lin * thickness)
     mu_lin: linear attenuation coefficient (1/cm)
     thickness: cm
+    Arrays broadcast.
     """
     return np.exp(-mu_lin * thickness)
 
@@ -34,19 +38,21 @@ def required_thickness_for_target(mu_lin, target_fraction):
 # Monte Carlo validator
 # ---------------------------
 
-def mc_transmission(mu_lin, thickness, N=100000, seed=None):
+def mc_transmission(mu_lin, thickness, N=100000, seed=None, n_streams=16):
     """
     Monte Carlo straight-line photon sampling:
     - sample path length s from exponential distribution with mean 1/mu_lin
     - transmission fraction = fraction with s > thickness
     This emulates photons travelling perpendicular to slab (no scattering).
+    The samples are filled in n_streams chunks, each from its own PCG64
+    generator spawned from seed, so a given seed reproduces the same result
+    regardless of the number of threads; one parallel kernel call counts them.
     """
-    if seed is not None:
-        np.random.seed(seed)
-    # sample s = -ln(U)/mu_lin
-    U = np.random.random(N)
-    s = -np.log(U) / mu_lin
-    transmitted = np.sum(s > thickness) / N
+    streams = [np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(n_streams)]
+    U = np.empty(N)
+    for k, rng in enumerate(streams):
+        rng.random(out=U[k * N // n_streams:(k + 1) * N // n_streams])
+    transmitted = np.float64(mc_transmission_kernel(U, mu_lin, thickness)) / N  # nan for N = 0
     se = np.sqrt(transmitted * (1 - transmitted) / N)
     return transmitted, se
 
@@ -70,27 +76,94 @@ def single_material_solution(material, target_fraction):
     areal_density = material.get('density', 1.0) * thickness  # g/cm^2
     return thickness, areal_density, transmission_exponential(mu_lin, thickness)
 
+def single_material_solutions(mu_lin, density, target_fraction):
+    """
+    Vectorized single_material_solution over many materials at once.
+    mu_lin, density: arrays (1/cm, g/cm3), one entry per material
+    Returns: (thicknesses_cm, areal_densities_g_per_cm2, transmissions) arrays
+    """
+    thicknesses = required_thickness_for_target(mu_lin, target_fraction)
+    areals = density * thicknesses
+    return thicknesses, areals, np.full_like(thicknesses, target_fraction)
+
 # ---------------------------
-# Two-material brute-force optimizer
+# Two-material optimizers
 # ---------------------------
 
+def mu_lin_from(mat):
+    """
+    Linear attenuation (1/cm) of a material dict as in single_material_solution
+    """
+    if 'mu_lin' in mat:
+        return mat['mu_lin']
+    return linear_mu_from_mass(mat['mu_mass'], mat['density'])
+
 def optimize_two_materials(mat1, mat2, target_fraction,
-                           max_thickness1=50.0, max_thickness2=50.0,
-                           steps1=201, steps2=201):
+                           max_thickness1=50.0, max_thickness2=50.0):
+    """
+    Exact optimum for thicknesses of mat1 and mat2 that:
+      - achieve transmission <= target_fraction
+      - minimize total areal density (mass per unit area)
+    This is a two-variable LP: minimize rho1*t1 + rho2*t2 subject to
+    mu1*t1 + mu2*t2 >= -ln(target) and 0 <= tX <= max_thicknessX. Each cm of
+    material X buys mu_X of optical depth for rho_X of mass, so the optimum uses
+    the material with the smaller rho/mu first, up to its limit, and makes up
+    the rest with the other one.
+    matX: material dict as in single_material_solution
+    max_thicknessX: thickness limits in cm
+    Returns: dict with best solution, or None if the limits cannot meet the target
+    """
+    mu = (mu_lin_from(mat1), mu_lin_from(mat2))
+    rho = (mat1.get('density', 1.0), mat2.get('density', 1.0))
+    max_thickness = (max_thickness1, max_thickness2)
+    depth_needed = -np.log(target_fraction)
+
+    # A transparent material (mu = 0) buys no depth at any cost
+    ratio = [rho[k] / mu[k] if mu[k] > 0 else np.inf for k in (0, 1)]
+    first = 0 if ratio[0] < ratio[1] else 1
+    second = 1 - first
+    t = [0.0, 0.0]
+    if mu[first] > 0:
+        t[first] = min(max(depth_needed, 0.0) / mu[first], float(max_thickness[first]))
+    remaining = depth_needed - mu[first] * t[first]
+    if remaining > 0:
+        if mu[second] == 0:
+            return None
+        t[second] = float(remaining / mu[second])
+    # The divisions can round the depth a hair short of the target; grow the
+    # layer that closes the gap from one ulp up, doubling the step each time, so
+    # the overshoot is at most twice the missing correction
+    closing = second if (t[second] > 0 or t[first] >= max_thickness[first]) else first
+    step = np.spacing(t[closing])
+    while np.exp(-(mu[0] * t[0] + mu[1] * t[1])) > target_fraction:
+        if mu[closing] == 0:
+            return None
+        t[closing] = float(t[closing] + step)
+        step *= 2
+    if t[closing] > max_thickness[closing]:
+        return None
+
+    depth = mu[0] * t[0] + mu[1] * t[1]
+    return {
+        't1_cm': t[0],
+        't2_cm': t[1],
+        'areal_density_g_per_cm2': rho[0] * t[0] + rho[1] * t[1],
+        'transmission': np.exp(-depth)
+    }
+
+def optimize_two_materials_grid(mat1, mat2, target_fraction,
+                                max_thickness1=50.0, max_thickness2=50.0,
+                                steps1=201, steps2=201):
     """
     Grid search over thicknesses of mat1 and mat2 to find combination that:
       - achieves transmission <= target_fraction
       - minimizes total areal density (mass per unit area)
+    Kept to validate optimize_two_materials.
     matX: material dict as in single_material_solution
     max_thicknessX: search limits in cm
     stepsX: grid resolution
     Returns: dict with best solution and full search arrays (optional)
     """
-    # get mu_lin and density
-    def mu_lin_from(mat):
-        if 'mu_lin' in mat:
-            return mat['mu_lin']
-        return linear_mu_from_mass(mat['mu_mass'], mat['density'])
     mu1 = mu_lin_from(mat1)
     mu2 = mu_lin_from(mat2)
     rho1 = mat1.get('density', 1.0)
@@ -99,39 +172,29 @@ def optimize_two_materials(mat1, mat2, target_fraction,
     t1_vals = np.linspace(0, max_thickness1, steps1)
     t2_vals = np.linspace(0, max_thickness2, steps2)
 
-    best = None
-    best_details = None
-
-    # grid search
-    for t1 in t1_vals:
-        # Transmission after layer 1 then layer 2 (assume same beam normal incidence)
-        trans1 = np.exp(-mu1 * t1)
-        # For vectorization: compute trans2 for all t2
-        trans2 = np.exp(-mu2 * t2_vals)
-        total_trans = trans1 * trans2  # product of attenuations
-        mask_ok = total_trans <= target_fraction
-        if not np.any(mask_ok):
-            continue
-        # compute areal density
-        areal = rho1 * t1 + rho2 * t2_vals
-        areal_ok = areal[mask_ok]
-        t2_ok = t2_vals[mask_ok]
-        trans_ok = total_trans[mask_ok]
-        # find minimal areal among ok combos for this t1
-        idx = np.argmin(areal_ok)
-        this_best_areal = areal_ok[idx]
-        this_best_t2 = t2_ok[idx]
-        this_best_trans = trans_ok[idx]
-        if (best is None) or (this_best_areal < best):
-            best = this_best_areal
-            best_details = {
-                't1_cm': t1,
-                't2_cm': this_best_t2,
-                'areal_density_g_per_cm2': this_best_areal,
-                'transmission': this_best_trans
-            }
-
-    return best_details
+    # Transmission through layer 1 then layer 2 (same beam, normal incidence)
+    # is exp(-depth); exp(-depth) <= target is the same as depth >= -ln(target),
+    # so only the winning cell needs an exp
+    depth_needed = -np.log(target_fraction)
+
+    # For fixed t1 the depth grows and the areal density grows with t2, so the
+    # best feasible t2 is the first grid value whose depth covers what layer 1
+    # leaves. Find it for every t1 at once with a binary search.
+    j = np.searchsorted(mu2 * t2_vals, depth_needed - mu1 * t1_vals, side='left')
+    feasible = j < steps2
+    if not np.any(feasible):
+        return None
+    j = np.minimum(j, steps2 - 1)
+    areal = np.where(feasible, rho1 * t1_vals + rho2 * t2_vals[j], np.inf)
+    i = np.argmin(areal)
+    j = j[i]
+
+    return {
+        't1_cm': t1_vals[i],
+        't2_cm': t2_vals[j],
+        'areal_density_g_per_cm2': areal[i],
+        'transmission': np.exp(-(mu1 * t1_vals[i] + mu2 * t2_vals[j]))
+    }
 
 # ---------------------------
 # Example materials (illustrative values)
@@ -139,73 +202,155 @@ def optimize_two_materials(mat1, mat2, target_fraction,
 # Units:
 #  - mu_mass in cm^2/g (mass attenuation)
 #  - density in g/cm3
-#  - mu_lin in 1/cm if provided directly
+#  - mu_lin in 1/cm (derived)
+# Stored as parallel arrays, one entry per material.
 # ---------------------------
 
-materials = {
-    'lead':     {'name': 'Lead',     'density': 11.34, 'mu_mass': 0.044},  # example mass coeff (1 MeV gamma-ish)
-    'concrete': {'name': 'Concrete', 'density': 2.3,  'mu_mass': 0.035},  # illustrative
-    'water':    {'name': 'Water',    'density': 1.0,  'mu_mass': 0.034},
-    # you can add 'mu_lin' directly if you have it:
-    # 'steel': {'name': 'Steel','mu_lin': 0.12, 'density': 7.8}
-}
+material_keys = np.array(['lead', 'concrete', 'water'])
+material_names = np.array(['Lead', 'Concrete', 'Water'])
+material_density = np.array([11.34, 2.3, 1.0])      # g/cm3
+material_mu_mass = np.array([0.044, 0.035, 0.034])  # cm^2/g; lead: example mass coeff (1 MeV gamma-ish), others illustrative
+# you can add a material with a known mu_lin by appending mu_lin/density as its mu_mass:
+# e.g. steel: mu_lin 0.12, density 7.8 -> mu_mass 0.12/7.8
 
-# Precompute mu_lin for convenience
-for m in materials.values():
-    if 'mu_lin' not in m:
-        m['mu_lin'] = linear_mu_from_mass(m['mu_mass'], m['density'])
+# Precompute mu_lin for every material in one vector op
+material_mu_lin = linear_mu_from_mass(material_mu_mass, material_density)
+
+def material_index(key):
+    """
+    Index of material `key` (e.g. 'lead') in the material arrays
+    """
+    idx = np.flatnonzero(material_keys == key)
+    if idx.size == 0:
+        raise KeyError(key)
+    return idx[0]
+
+def material(key):
+    """
+    Material dict (as used by single_material_solution) for `key`
+    """
+    i = material_index(key)
+    return {'name': str(material_names[i]), 'density': material_density[i],
+            'mu_mass': material_mu_mass[i], 'mu_lin': material_mu_lin[i]}
 
 # ---------------------------
 # Example usage
 # ---------------------------
 
-if __name__ == "__main__":
-    # Problem statement:
-    # Suppose you have a gamma source and want to reduce intensity by a factor of 1e6 (I/I0 <= 1e-6)
-    target = 1e-6
+def simulate(target, pair=('concrete', 'lead'), max_thickness=(100.0, 20.0), grid_steps=(401, 401),
+             mc_material='lead', mc_thickness=10.0, mc_N=200000, seed=42):
+    """
+    Run the example study for one target transmission (I/I0) over the material arrays:
+      - single-material thickness/areal density for every material
+      - transmission curves over 0-50 cm
+      - two-material optimization for `pair` within `max_thickness`, checked
+        against a grid search with `grid_steps` points
+      - Monte Carlo check of `mc_material` at `mc_thickness`
+    Returns dict of results (no printing or plotting)
+    """
+    thicknesses, areals, _ = single_material_solutions(material_mu_lin, material_density, target)
+
+    thickness_range = np.linspace(0, 50, 501)  # cm
+    # T[material, thickness] for every material in one broadcast evaluation
+    curves = transmission_exponential(material_mu_lin[:, None], thickness_range[None, :])
+
+    matA = material(pair[0])
+    matB = material(pair[1])
+    best = optimize_two_materials(matA, matB, target_fraction=target,
+                                  max_thickness1=max_thickness[0], max_thickness2=max_thickness[1])
+    best_grid = optimize_two_materials_grid(matA, matB, target_fraction=target,
+                                            max_thickness1=max_thickness[0], max_thickness2=max_thickness[1],
+                                            steps1=grid_steps[0], steps2=grid_steps[1])
 
+    k = material_index(mc_material)
+    trans_analytic = transmission_exponential(material_mu_lin[k], mc_thickness)
+    trans_mc, se = mc_transmission(material_mu_lin[k], mc_thickness, N=mc_N, seed=seed)
+
+    return {
+        'target': target,
+        'names': material_names,
+        'thicknesses_cm': thicknesses,
+        'areal_densities_g_per_cm2': areals,
+        'thickness_range_cm': thickness_range,
+        'transmission_curves': curves,
+        'pair': (matA['name'], matB['name']),
+        'two_material_best': best,
+        'two_material_grid': best_grid,
+        'mc_material': material_names[k],
+        'mc_thickness_cm': mc_thickness,
+        'mc_analytic': trans_analytic,
+        'mc_transmission': trans_mc,
+        'mc_se': se,
+    }
+
+def report(results):
+    """
+    Print the results of simulate()
+    """
+    target = results['target']
     print("TARGET transmission (I/I0) =", target)
     print("\nSingle-material results (illustrative coefficients):")
-    for key, mat in materials.items():
-        thickness, areal, trans = single_material_solution(mat, target)
-        print(f"  {mat['name']:8s}: thickness = {thickness:.2f} cm, areal density = {areal:.2f} g/cm^2")
-
-    # Plot Transmission vs thickness for each material
-    thickness_range = np.linspace(0, 50, 501)  # cm
-    plt.figure(figsize=(8,5))
-    for key, mat in materials.items():
-        mu = mat['mu_lin']
-        T = np.exp(-mu * thickness_range)
-        plt.semilogy(thickness_range, T, label=f"{mat['name']}")
-    plt.axhline(target, color='k', linestyle='--', label=f"target {target:.0e}")
-    plt.xlabel("Thickness (cm)")
-    plt.ylabel("Transmission I/I0 (log scale)")
-    plt.title("Transmission vs Thickness (illustrative materials)")
-    plt.legend()
-    plt.grid(True, which='both', ls=':', alpha=0.6)
-    plt.show()
+    for name, thickness, areal in zip(results['names'], results['thicknesses_cm'],
+                                      results['areal_densities_g_per_cm2']):
+        print(f"  {name:8s}: thickness = {thickness:.2f} cm, areal density = {areal:.2f} g/cm^2")
 
     # Two-material optimization example: minimize total mass-per-area while meeting target
     print("\nTwo-material optimization (minimize areal density to meet target):")
-    matA = materials['concrete']
-    matB = materials['lead']
-    # search up to 100 cm of concrete and 20 cm of lead
-    best = optimize_two_materials(matA, matB, target_fraction=target,
-                                  max_thickness1=100.0, max_thickness2=20.0,
-                                  steps1=401, steps2=401)
+    nameA, nameB = results['pair']
+    best = results['two_material_best']
     if best:
-        print(f"  Best combo: {matA['name']} {best['t1_cm']:.2f} cm + {matB['name']} {best['t2_cm']:.2f} cm")
+        print(f"  Best combo: {nameA} {best['t1_cm']:.2f} cm + {nameB} {best['t2_cm']:.2f} cm")
         print(f"  -> Areal density = {best['areal_density_g_per_cm2']:.2f} g/cm^2, Transmission = {best['transmission']:.2e}")
+        grid = results['two_material_grid']
+        if grid:
+            print(f"  Grid search check: {nameA} {grid['t1_cm']:.2f} cm + {nameB} {grid['t2_cm']:.2f} cm, "
+                  f"areal density = {grid['areal_density_g_per_cm2']:.2f} g/cm^2")
     else:
         print("  No combination in the search range met the target. Increase max thickness or adjust materials.")
 
     # Monte Carlo validation for single-material example
-    mat = materials['lead']
-    thickness_example = 10.0  # cm
-    trans_analytic = transmission_exponential(mat['mu_lin'], thickness_example)
-    trans_mc, se = mc_transmission(mat['mu_lin'], thickness_example, N=200000, seed=42)
-    print(f"\nMonte Carlo check (straight-line, no scattering) for {mat['name']} {thickness_example:.1f} cm:")
-    print(f"  Analytic transmission = {trans_analytic:.3e}")
-    print(f"  MC transmission = {trans_mc:.3e} ± {1.96*se:.3e} (95% CI)")
-
-# End of script
\ No newline at end of file
+    print(f"\nMonte Carlo check (straight-line, no scattering) for {results['mc_material']} {results['mc_thickness_cm']:.1f} cm:")
+    print(f"  Analytic transmission = {results['mc_analytic']:.3e}")
+    print(f"  MC transmission = {results['mc_transmission']:.3e} ± {1.96*results['mc_se']:.3e} (95% CI)")
+
+def plot(results):
+    """
+    Plot transmission vs thickness for each material from simulate() and return the figure
+    """
+    target = results['target']
+    thickness_range = results['thickness_range_cm']
+    fig = plt.figure(figsize=(8,5))
+    T = results['transmission_curves']
+    for i, name in enumerate(results['names']):
+        plt.semilogy(thickness_range, T[i], label=f"{name}")
+    plt.axhline(target, color='k', linestyle='--', label=f"target {target:.0e}")
+    plt.xlabel("Thickness (cm)")
+    plt.ylabel("Transmission I/I0 (log scale)")
+    plt.title("Transmission vs Thickness (illustrative materials)")
+    plt.legend()
+    plt.grid(True, which='both', ls=':', alpha=0.6)
+    return fig
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Radiation shielding thickness optimizer")
+    parser.add_argument('--target', type=float, default=1e-6, help="allowed transmission I/I0 (default 1e-6)")
+    parser.add_argument('--plot', action='store_true', help="show the transmission curves")
+    parser.add_argument('--save', metavar='FILE', help="write the transmission curves to FILE")
+    args = parser.parse_args()
+    if not args.plot:
+        matplotlib.use('Agg')  # No GUI needed for batch runs
+
+    # Problem statement:
+    # Suppose you have a gamma source and want to reduce intensity by a factor of 1e6 (I/I0 <= 1e-6)
+    # Search up to 100 cm of concrete and 20 cm of lead
+    results = simulate(args.target)
+    report(results)
+
+    if args.plot or args.save:
+        fig = plot(results)
+        if args.save:
+            fig.savefig(args.save)
+        if args.plot:
+            plt.show()
+
+# End of script
@@ -0,0 +1,54 @@
+import numpy as np
+from numba import njit, prange
+
+# ---------------------------
+# Compiled physics kernels shared by the point kinetics and shielding
+# scripts. cache=True stores the machine code next to this file,
+# so only the first run pays the compile cost.
+# ---------------------------
+
+# ---------------------------
+# Monte Carlo attenuation
+# ---------------------------
+
+@njit(parallel=True, fastmath=True, cache=True)
+def mc_transmission_kernel(U, mu_lin, thickness):
+    """
+    Number of uniform samples U whose photon crosses the slab, as a prange
+    reduction. A photon crosses when U < exp(-mu_lin * thickness) (same event
+    as -ln(U)/mu_lin > thickness).
+    """
+    threshold = np.exp(-mu_lin * thickness)
+    count = 0
+    for i in prange(U.shape[0]):
+        if U[i] < threshold:
+            count += 1
+    return count
+
+# ---------------------------
+# Point kinetics
+# ---------------------------
+
+@njit(cache=True)
+def point_kinetics_coefficients(rho, beta_i, Lambda):
+    """
+    Loop-invariant RHS constants, computed once per integration:
+      prompt_coef = (rho - beta)/Lambda with beta = sum(beta_i)
+      beta_over_L = beta_i/Lambda
+    """
+    return (rho - np.sum(beta_i)) / Lambda, beta_i / Lambda
+
+@njit(cache=True, fastmath=True)
+def point_kinetics_rhs(y, prompt_coef, beta_over_L, lambda_i, S, out):
+    """
+    y[0] = neutron density n
+    y[1:] = precursor concentrations C_i
+    prompt_coef, beta_over_L = constants from point_kinetics_coefficients
+    out = preallocated output for dy/dt, same layout as y (filled in place)
+    """
+    n = y[0]
+    dn_dt = prompt_coef * n + S
+    for i in range(lambda_i.shape[0]):
+        dn_dt += lambda_i[i] * y[i + 1]
+        out[i + 1] = beta_over_L[i] * n - lambda_i[i] * y[i + 1]
+    out[0] = dn_dt
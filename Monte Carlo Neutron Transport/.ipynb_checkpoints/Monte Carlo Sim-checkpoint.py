@@ -1,12 +1,14 @@
 import numpy as np 
+import matplotlib.pyplot as plt 
 
-def slab_transmission(Sig_t, thickness, N, isotropic = false): 
+def slab_transmission(Sig_t, thickness, N, isotropic = False, debug = False): 
     """Compute the fraction of neutrons that leak through a slab
     Inputs: 
     Sig_t: THe total macroscopic x-section
     Thickness: Width of the slab 
     N: Number of neutrons to simulate 
     Isotropic: Are the neutrons isotropuc or a beam 
+    Debug: Scatter plot the penetration depths (only for N <= 1000)
 
     Returns: 
     Transmission: The fraction of neutrons that made it through 
@@ -15,17 +17,21 @@ def slab_transmission(Sig_t, thickness, N, isotropic = false):
     if(isotropic):
         mu = np.random.random(N)
     else:
-        mu = np.ones(N)
-    thetas = np.random.random(N)
-    x = -np.log(1 - thetas) / Sig_t 
-    transmisison = np.sum(x > thickness / mu) / N
+        mu = 1.0  # A beam: one scalar threshold for every neutron
+    # x = -ln(U)/Sig_t > thickness/mu  <=>  U < exp(-Sig_t * thickness / mu),
+    # so the comparison needs no log of the samples
+    U = np.random.random(N)
+    threshold = np.exp(-Sig_t * thickness / mu)
+    transmission = np.count_nonzero(U < threshold) / N
 
     # For a small number of neutrons we'll ouput a little more 
-    if (N <= 1000): 
-        plt.scatter(x * mu, np.arrange(N))
+    if (debug and N <= 1000): 
+        x = -np.log(U) / Sig_t
+        plt.scatter(x * mu, np.arange(N))
         plt.xlabel("Distance traveled into slab") 
         plt.ylabel("Neutron Number")
-return transmission 
+        plt.show()
+    return transmission 
 
 ### Test the function with a small number of neutrons
 
@@ -34,5 +40,5 @@ thickness = 3.0
 N = 1000
 
 
-transmission = slab_transmission(Sigma_t, thickness, N, isotropic = True) 
-print("Out of", N,"neutrons only", int(transmission * N), "made it through.\n The fraction that made it through was", transmission) 
\ No newline at end of file
+transmission = slab_transmission(Sigma_t, thickness, N, isotropic = True, debug = True) 
+print("Out of", N,"neutrons only", int(transmission * N), "made it through.\n The fraction that made it through was", transmission)
\ No newline at end of file